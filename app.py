@@ -1,8 +1,9 @@
 from flask import Flask, render_template, request, jsonify, send_file
 from werkzeug.utils import secure_filename
 import os
+import time
 from datetime import datetime, timedelta
-from main import NetworkAnomalyDetector
+from main import NetworkAnomalyDetector, plot_path, PENDING_SUFFIX, FAILED_SUFFIX
 import pandas as pd
 from generate_sample_data import generate_sample_data
 
@@ -10,12 +11,43 @@ app = Flask(__name__)
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
+# Plots render in the background, possibly in another worker process;
+# /visualization waits up to this many seconds while a render is pending
+VISUALIZATION_WAIT_SECONDS = 30
+
 # Ensure required directories exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 os.makedirs('outputs', exist_ok=True)
 
+def wait_for_render(path, timeout):
+    """Poll while the plot at path is marked pending, up to timeout seconds."""
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(path) and os.path.exists(path + PENDING_SUFFIX):
+        if time.monotonic() >= deadline:
+            return
+        time.sleep(0.1)
+
 def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in {'csv'}
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in {'csv', 'parquet'}
+
+def save_upload():
+    """Validate and save the uploaded file.
+
+    Returns (filepath, None) on success, or (None, error response) otherwise.
+    """
+    if 'file' not in request.files:
+        return None, (jsonify({'error': 'No file uploaded'}), 400)
+    
+    file = request.files['file']
+    if file.filename == '':
+        return None, (jsonify({'error': 'No file selected'}), 400)
+    
+    if not allowed_file(file.filename):
+        return None, (jsonify({'error': 'Invalid file type'}), 400)
+    
+    filepath = os.path.join(app.config['UPLOAD_FOLDER'], secure_filename(file.filename))
+    file.save(filepath)
+    return filepath, None
 
 @app.route('/')
 def index():
@@ -23,58 +55,66 @@ def index():
 
 @app.route('/analyze', methods=['POST'])
 def analyze():
-    if 'file' not in request.files:
-        return jsonify({'error': 'No file uploaded'}), 400
+    filepath, error = save_upload()
+    if error:
+        return error
     
-    file = request.files['file']
-    if file.filename == '':
-        return jsonify({'error': 'No file selected'}), 400
+    try:
+        # Initialize detector
+        detector = NetworkAnomalyDetector()
+        
+        # Process data
+        df = detector.load_and_preprocess_data(filepath)
+        df = detector.detect_anomalies(df)
+        
+        # Generate visualizations
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        detector.visualize_results(df, timestamp)
+        
+        # Get statistics
+        anomaly_count = detector.anomaly_count
+        total_records = len(df)
+        
+        # Save anomalies to CSV
+        if anomaly_count > 0:
+            detector.export_anomalies(detector.get_sorted_anomalies(df), timestamp)
+        
+        # Get mitigation recommendations
+        recommendations = detector.get_mitigation_recommendations(df)
+        
+        return jsonify({
+            'success': True,
+            'timestamp': timestamp,
+            'statistics': {
+                'total_records': total_records,
+                'anomaly_count': anomaly_count,
+                'anomaly_percentage': round((anomaly_count/total_records) * 100, 2)
+            },
+            'recommendations': recommendations
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/retrain', methods=['POST'])
+def retrain():
+    filepath, error = save_upload()
+    if error:
+        return error
     
-    if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+    try:
+        # Ignore any cached model so the scaler and forest are refitted and saved
+        detector = NetworkAnomalyDetector(use_cached_model=False)
+        df = detector.load_and_preprocess_data(filepath)
+        detector.detect_anomalies(df)
         
-        try:
-            # Initialize detector
-            detector = NetworkAnomalyDetector()
-            
-            # Process data
-            df = detector.load_and_preprocess_data(filepath)
-            df = detector.detect_anomalies(df)
-            
-            # Generate visualizations
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            detector.visualize_results(df)
-            
-            # Get statistics
-            anomaly_count = df['anomaly'].value_counts().get('Anomaly', 0)
-            total_records = len(df)
-            
-            # Save anomalies to CSV
-            if anomaly_count > 0:
-                anomalies_df = df[df['anomaly'] == 'Anomaly'].sort_values('anomaly_score')
-                anomaly_file = os.path.join('outputs', f'anomalies_{timestamp}.csv')
-                anomalies_df.to_csv(anomaly_file, index=False)
-            
-            # Get mitigation recommendations
-            recommendations = detector.get_mitigation_recommendations(df)
-            
-            return jsonify({
-                'success': True,
-                'timestamp': timestamp,
-                'statistics': {
-                    'total_records': total_records,
-                    'anomaly_count': int(anomaly_count),
-                    'anomaly_percentage': round((anomaly_count/total_records) * 100, 2)
-                },
-                'recommendations': recommendations
-            })
-            
-        except Exception as e:
-            return jsonify({'error': str(e)}), 500
+        return jsonify({
+            'success': True,
+            'records': len(df)
+        })
         
-    return jsonify({'error': 'Invalid file type'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
 @app.route('/download/<timestamp>')
 def download(timestamp):
@@ -87,16 +127,33 @@ def download(timestamp):
     except Exception as e:
         return jsonify({'error': str(e)}), 404
 
+@app.route('/download/<timestamp>.parquet')
+def download_parquet(timestamp):
+    try:
+        return send_file(
+            f'outputs/anomalies_{timestamp}.parquet',
+            as_attachment=True,
+            download_name=f'anomalies_{timestamp}.parquet'
+        )
+    except Exception as e:
+        return jsonify({'error': str(e)}), 404
+
 @app.route('/visualization/<timestamp>/<type>')
 def get_visualization(timestamp, type):
     try:
-        if type == 'scatter':
-            filename = f'anomaly_scatter_{timestamp}.png'
-        else:
-            filename = f'anomaly_distribution_{timestamp}.png'
+        path = plot_path('scatter' if type == 'scatter' else 'distribution', timestamp)
+        filename = os.path.basename(path)
+        
+        # Plots are written atomically, so once the file exists it is complete;
+        # only a render that is still marked pending is worth waiting for
+        wait_for_render(path, VISUALIZATION_WAIT_SECONDS)
+        if os.path.exists(path + FAILED_SUFFIX):
+            return jsonify({'error': f'Rendering {filename} failed'}), 500
+        if not os.path.exists(path):
+            return jsonify({'error': f'Visualization {filename} is not available'}), 404
             
         return send_file(
-            f'outputs/{filename}',
+            path,
             mimetype='image/png'
         )
     except Exception as e:
@@ -141,4 +198,8 @@ def download_sample(filename):
         return jsonify({'error': str(e)}), 404
 
 if __name__ == '__main__':
-    app.run(debug=True) 
\ No newline at end of file
+    # Debug reloader only on request; use gunicorn (see gunicorn.conf.py) in production
+    if os.getenv('FLASK_DEV'):
+        app.run(debug=True)
+    else:
+        app.run(threaded=True)
@@ -7,7 +7,7 @@ def generate_sample_data(start_date=None, duration_hours=24, output_file='networ
     """Generate sample network traffic data with unique patterns each time"""
     # Use current timestamp as seed for unique data generation
     current_seed = int(time.time() * 1000) % 2**32
-    np.random.seed(current_seed)
+    rng = np.random.default_rng(current_seed)
     
     if start_date is None:
         start_date = datetime.now()
@@ -26,33 +26,11 @@ def generate_sample_data(start_date=None, duration_hours=24, output_file='networ
     
     # Generate base patterns with randomization
     base_patterns = {
-        'normal_traffic_mean': np.random.uniform(400000, 600000),
-        'normal_traffic_std': np.random.uniform(100000, 200000),
-        'normal_packet_mean': np.random.uniform(800, 1200),
-        'normal_packet_std': np.random.uniform(200, 400),
-        'anomaly_multiplier': np.random.uniform(3, 5)
-    }
-    
-    # Generate normal traffic data
-    normal_data = {
-        'bytes_transferred': np.random.normal(
-            base_patterns['normal_traffic_mean'],
-            base_patterns['normal_traffic_std'],
-            n_normal
-        ),
-        'packet_count': np.random.normal(
-            base_patterns['normal_packet_mean'],
-            base_patterns['normal_packet_std'],
-            n_normal
-        ),
-        'connection_duration': np.random.gamma(shape=3, scale=10, size=n_normal),
-        'source_port': np.random.randint(1024, 65535, n_normal),
-        'destination_port': np.random.choice(
-            [80, 443, 22, 21, 3306, 5432, 8080, 8443, 25, 53],
-            n_normal,
-            p=[0.3, 0.25, 0.1, 0.05, 0.05, 0.05, 0.05, 0.05, 0.05, 0.05]
-        ),
-        'retransmission_rate': np.random.beta(2, 50, n_normal),
+        'normal_traffic_mean': rng.uniform(400000, 600000),
+        'normal_traffic_std': rng.uniform(100000, 200000),
+        'normal_packet_mean': rng.uniform(800, 1200),
+        'normal_packet_std': rng.uniform(200, 400),
+        'anomaly_multiplier': rng.uniform(3, 5)
     }
     
     # Split anomalous data into three equal parts
@@ -64,112 +42,137 @@ def generate_sample_data(start_date=None, duration_hours=24, output_file='networ
     for i in range(remainder):
         anomaly_sizes[i] += 1
     
-    # Generate different types of anomalous patterns
-    ddos_pattern = {
-        'bytes': np.random.normal(
-            base_patterns['normal_traffic_mean'] * base_patterns['anomaly_multiplier'],
-            base_patterns['normal_traffic_std'] * 2,
-            anomaly_sizes[0]
-        ),
-        'packets': np.random.normal(
-            base_patterns['normal_packet_mean'] * base_patterns['anomaly_multiplier'],
-            base_patterns['normal_packet_std'] * 2,
-            anomaly_sizes[0]
-        )
-    }
-    
-    data_exfil_pattern = {
-        'bytes': np.random.normal(100, 50, anomaly_sizes[1]),
-        'packets': np.random.normal(50, 20, anomaly_sizes[1])
-    }
-    
-    scan_pattern = {
-        'bytes': np.random.normal(
-            base_patterns['normal_traffic_mean'] * 0.1,
-            base_patterns['normal_traffic_std'] * 0.1,
-            anomaly_sizes[2]
-        ),
-        'packets': np.random.normal(
-            base_patterns['normal_packet_mean'] * 2,
-            base_patterns['normal_packet_std'],
-            anomaly_sizes[2]
-        )
-    }
+    # Row ranges for normal traffic followed by the three anomaly types
+    ddos_start = n_normal
+    exfil_start = ddos_start + anomaly_sizes[0]
+    scan_start = exfil_start + anomaly_sizes[1]
+    normal = slice(0, ddos_start)
+    ddos = slice(ddos_start, exfil_start)
+    exfil = slice(exfil_start, scan_start)
+    scan = slice(scan_start, total_records)
+    
+    # Preallocate each column and generate every pattern straight into its rows
+    bytes_transferred = np.empty(total_records)
+    packet_count = np.empty(total_records)
+    connection_duration = np.empty(total_records)
+    destination_port = np.empty(total_records, dtype=np.int64)
+    retransmission_rate = np.empty(total_records)
     
-    # Combine anomalous patterns
-    anomalous_data = {
-        'bytes_transferred': np.concatenate([
-            ddos_pattern['bytes'],
-            data_exfil_pattern['bytes'],
-            scan_pattern['bytes']
-        ]),
-        'packet_count': np.concatenate([
-            ddos_pattern['packets'],
-            data_exfil_pattern['packets'],
-            scan_pattern['packets']
-        ]),
-        'connection_duration': np.concatenate([
-            np.random.uniform(0.1, 1, anomaly_sizes[0]),     # DDoS: very short connections
-            np.random.uniform(300, 600, anomaly_sizes[1]),   # Data exfil: long connections
-            np.random.uniform(0.1, 0.5, anomaly_sizes[2])    # Scan: very short connections
-        ]),
-        'source_port': np.random.randint(1024, 65535, n_anomalous),
-        'destination_port': np.concatenate([
-            np.random.choice([80, 443], anomaly_sizes[0]),                 # DDoS: common ports
-            np.random.choice([21, 22, 3306], anomaly_sizes[1]),           # Data exfil: sensitive ports
-            np.random.randint(1, 65535, anomaly_sizes[2])                 # Scan: random ports
-        ]),
-        'retransmission_rate': np.concatenate([
-            np.random.beta(5, 2, anomaly_sizes[0]),      # DDoS: high retransmission
-            np.random.beta(1, 50, anomaly_sizes[1]),     # Data exfil: low retransmission
-            np.random.beta(2, 20, anomaly_sizes[2])      # Scan: medium retransmission
-        ])
-    }
+    # Generate normal traffic data
+    bytes_transferred[normal] = rng.normal(
+        base_patterns['normal_traffic_mean'],
+        base_patterns['normal_traffic_std'],
+        n_normal
+    )
+    packet_count[normal] = rng.normal(
+        base_patterns['normal_packet_mean'],
+        base_patterns['normal_packet_std'],
+        n_normal
+    )
+    connection_duration[normal] = rng.gamma(shape=3, scale=10, size=n_normal)
+    destination_port[normal] = rng.choice(
+        [80, 443, 22, 21, 3306, 5432, 8080, 8443, 25, 53],
+        n_normal,
+        p=[0.3, 0.25, 0.1, 0.05, 0.05, 0.05, 0.05, 0.05, 0.05, 0.05]
+    )
+    retransmission_rate[normal] = rng.beta(2, 50, n_normal)
     
-    # Combine normal and anomalous data
-    for key in normal_data.keys():
-        normal_data[key] = np.concatenate([normal_data[key], anomalous_data[key]])
+    # DDoS: traffic spikes on common ports, very short connections, high retransmission
+    bytes_transferred[ddos] = rng.normal(
+        base_patterns['normal_traffic_mean'] * base_patterns['anomaly_multiplier'],
+        base_patterns['normal_traffic_std'] * 2,
+        anomaly_sizes[0]
+    )
+    packet_count[ddos] = rng.normal(
+        base_patterns['normal_packet_mean'] * base_patterns['anomaly_multiplier'],
+        base_patterns['normal_packet_std'] * 2,
+        anomaly_sizes[0]
+    )
+    connection_duration[ddos] = rng.uniform(0.1, 1, anomaly_sizes[0])
+    destination_port[ddos] = rng.choice([80, 443], anomaly_sizes[0])
+    retransmission_rate[ddos] = rng.beta(5, 2, anomaly_sizes[0])
+    
+    # Data exfil: small transfers to sensitive ports, long connections, low retransmission
+    bytes_transferred[exfil] = rng.normal(100, 50, anomaly_sizes[1])
+    packet_count[exfil] = rng.normal(50, 20, anomaly_sizes[1])
+    connection_duration[exfil] = rng.uniform(300, 600, anomaly_sizes[1])
+    destination_port[exfil] = rng.choice([21, 22, 3306], anomaly_sizes[1])
+    retransmission_rate[exfil] = rng.beta(1, 50, anomaly_sizes[1])
+    
+    # Scan: random ports, very short connections, medium retransmission
+    bytes_transferred[scan] = rng.normal(
+        base_patterns['normal_traffic_mean'] * 0.1,
+        base_patterns['normal_traffic_std'] * 0.1,
+        anomaly_sizes[2]
+    )
+    packet_count[scan] = rng.normal(
+        base_patterns['normal_packet_mean'] * 2,
+        base_patterns['normal_packet_std'],
+        anomaly_sizes[2]
+    )
+    connection_duration[scan] = rng.uniform(0.1, 0.5, anomaly_sizes[2])
+    destination_port[scan] = rng.integers(1, 65535, anomaly_sizes[2])
+    retransmission_rate[scan] = rng.beta(2, 20, anomaly_sizes[2])
     
     # Create DataFrame
-    df = pd.DataFrame(normal_data)
+    df = pd.DataFrame({
+        'bytes_transferred': bytes_transferred,
+        'packet_count': packet_count,
+        'connection_duration': connection_duration,
+        'source_port': rng.integers(1024, 65535, total_records),
+        'destination_port': destination_port,
+        'retransmission_rate': retransmission_rate,
+    })
     
     # Add protocols with realistic distribution
-    protocols = np.random.choice(
+    protocols = rng.choice(
         ['TCP', 'UDP', 'HTTP', 'HTTPS', 'SSH', 'FTP'],
         size=len(df),
         p=[0.3, 0.2, 0.2, 0.15, 0.1, 0.05]
     )
     
     # Add protocol-specific patterns
-    df['protocol'] = protocols
-    df.loc[df['destination_port'] == 80, 'protocol'] = np.random.choice(['HTTP', 'TCP'], size=len(df[df['destination_port'] == 80]))
-    df.loc[df['destination_port'] == 443, 'protocol'] = np.random.choice(['HTTPS', 'TCP'], size=len(df[df['destination_port'] == 443]))
-    df.loc[df['destination_port'] == 22, 'protocol'] = 'SSH'
-    df.loc[df['destination_port'] == 21, 'protocol'] = 'FTP'
+    ports = df['destination_port'].to_numpy()
+    df['protocol'] = np.select(
+        [ports == 80, ports == 443, ports == 22, ports == 21],
+        [
+            rng.choice(['HTTP', 'TCP'], size=len(df)),
+            rng.choice(['HTTPS', 'TCP'], size=len(df)),
+            'SSH',
+            'FTP'
+        ],
+        default=protocols
+    )
     
     # Add timestamp and ensure it matches the total number of records
-    df['timestamp'] = pd.Series(timestamps[:len(df)]).sample(n=len(df), replace=False).sort_values().reset_index(drop=True)
+    # (date_range is already sorted, so rows are in timestamp order)
+    df['timestamp'] = timestamps[:len(df)]
     
     # Add derived features with some noise
-    df['bytes_per_packet'] = (df['bytes_transferred'] / df['packet_count']) * np.random.normal(1, 0.1, len(df))
-    df['packets_per_second'] = (df['packet_count'] / df['connection_duration']) * np.random.normal(1, 0.1, len(df))
+    df['bytes_per_packet'] = (df['bytes_transferred'] / df['packet_count']) * rng.normal(1, 0.1, len(df))
+    df['packets_per_second'] = (df['packet_count'] / df['connection_duration']) * rng.normal(1, 0.1, len(df))
     
     # Add time-based patterns
-    hour_of_day = df['timestamp'].dt.hour
-    df.loc[hour_of_day.between(1, 5), 'bytes_transferred'] *= np.random.uniform(0.5, 0.8, len(df[hour_of_day.between(1, 5)]))
-    df.loc[hour_of_day.between(9, 17), 'bytes_transferred'] *= np.random.uniform(1.2, 1.5, len(df[hour_of_day.between(9, 17)]))
-    
-    # Sort by timestamp
-    df = df.sort_values('timestamp').reset_index(drop=True)
+    # Hours come straight from the DatetimeIndex; no .dt accessor Series is built
+    hour_of_day = timestamps[:len(df)].hour.to_numpy()
+    night = (hour_of_day >= 1) & (hour_of_day <= 5)
+    business_hours = (hour_of_day >= 9) & (hour_of_day <= 17)
+    hourly_multiplier = np.ones(len(df))
+    hourly_multiplier[night] = rng.uniform(0.5, 0.8, int(night.sum()))                     # Reduced traffic
+    hourly_multiplier[business_hours] = rng.uniform(1.2, 1.5, int(business_hours.sum()))  # Increased traffic
+    df['bytes_transferred'] = df['bytes_transferred'].to_numpy() * hourly_multiplier
     
     # Ensure all values are positive
-    df['bytes_transferred'] = df['bytes_transferred'].abs()
-    df['packet_count'] = df['packet_count'].abs()
-    df['connection_duration'] = df['connection_duration'].abs()
-    df['retransmission_rate'] = df['retransmission_rate'].abs()
-    
-    # Save to specified output file
-    df.to_csv(output_file, index=False)
+    positive_cols = ['bytes_transferred', 'packet_count', 'connection_duration', 'retransmission_rate']
+    values = df[positive_cols].to_numpy(dtype=np.float64, copy=True)
+    np.absolute(values, out=values)
+    df[positive_cols] = values
+    
+    # Save to specified output file (Parquet keeps columns in native binary form)
+    if output_file.lower().endswith('.parquet'):
+        df.to_parquet(output_file, engine='pyarrow', compression='snappy', index=False)
+    else:
+        df.to_csv(output_file, index=False)
     print(f"Sample network traffic data generated successfully: {output_file}")
     
     # Print some statistics
@@ -181,4 +184,4 @@ def generate_sample_data(start_date=None, duration_hours=24, output_file='networ
     return df
 
 if __name__ == "__main__":
-    generate_sample_data() 
\ No newline at end of file
+    generate_sample_data(output_file='network_traffic.parquet') 
\ No newline at end of file
@@ -0,0 +1,19 @@
+import multiprocessing
+import os
+
+# Gunicorn settings for serving app:app -- run with `gunicorn app:app`
+bind = '0.0.0.0:5000'
+
+# Analysis is CPU-bound pandas/sklearn work, so scale with processes, not threads
+workers = multiprocessing.cpu_count()
+worker_class = 'sync'
+
+# With one worker per core, letting each IsolationForest also use every core
+# would run ~cores^2 threads under load. Workers therefore fit/score
+# single-threaded: throughput scales across requests, at the cost of slower
+# individual fits. Set ISOLATION_FOREST_N_JOBS (or 'n_jobs' in config.json)
+# to override, e.g. when running fewer workers.
+os.environ.setdefault('ISOLATION_FOREST_N_JOBS', '1')
+
+# Fitting the model on a large upload can outlast the default 30s
+timeout = 120
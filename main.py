@@ -1,10 +1,12 @@
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import IsolationForest
-from sklearn.preprocessing import StandardScaler, MinMaxScaler
-import matplotlib.pyplot as plt
-import seaborn as sns
+import joblib
 import logging
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import os
 import json
@@ -21,13 +23,39 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+# Plots are rendered off the request path. While a render runs, a '.pending'
+# marker sits next to its PNG; a render that raises leaves a '.failed' marker.
+plot_executor = ThreadPoolExecutor(max_workers=2)
+PENDING_SUFFIX = '.pending'
+FAILED_SUFFIX = '.failed'
+
+def plot_path(plot_type, timestamp):
+    """Path of the PNG for a plot type ('scatter' or 'distribution')."""
+    return os.path.join('outputs', f'anomaly_{plot_type}_{timestamp}.png')
+
+# Normal points drawn in the scatter plot; anomalies are always drawn in full
+SCATTER_MAX_NORMAL_POINTS = 5000
+
+# Fitted scaler and model persisted between runs
+MODEL_PATH = os.path.join('outputs', 'model.pkl')
+
+# Recommendations keyed by anomaly fingerprint, shared across detector instances
+RECOMMENDATION_CACHE_SIZE = 128
+_recommendation_cache = OrderedDict()
+_recommendation_cache_lock = threading.Lock()
+
 class NetworkAnomalyDetector:
-    def __init__(self, config_file='config.json'):
+    def __init__(self, config_file='config.json', use_cached_model=True):
         """Initialize detector with configuration."""
+        self.config_file = config_file
         self.config = self.load_config(config_file)
-        self.scaler = StandardScaler()
+        self._mean = None
+        self._std = None
         self.model = None
+        self.anomaly_count = None
         self.mitigation_engine = MitigationEngine()
+        if use_cached_model:
+            self._load_cached_model()
         
     @staticmethod
     def load_config(config_file):
@@ -45,10 +73,51 @@ class NetworkAnomalyDetector:
             logging.warning(f"Config file {config_file} not found. Using defaults.")
             return default_config
 
+    def _load_cached_model(self):
+        """Restore a previously fitted scaler and model unless it is stale."""
+        if not os.path.exists(MODEL_PATH):
+            return
+        # A config edited after the model was saved invalidates it
+        if os.path.exists(self.config_file) and \
+                os.path.getmtime(self.config_file) > os.path.getmtime(MODEL_PATH):
+            logging.info("Cached model is older than config; it will be retrained")
+            return
+        try:
+            cached = joblib.load(MODEL_PATH)
+        except Exception as e:
+            logging.warning(f"Could not load cached model: {str(e)}")
+            return
+        if cached.get('features') != self.config['features'] or 'mean' not in cached:
+            logging.info("Cached model was trained on different features; it will be retrained")
+            return
+        self._mean = cached['mean']
+        self._std = cached['std']
+        self.model = cached['model']
+        # n_jobs is pickled with the model; apply this process's setting instead
+        self.model.set_params(n_jobs=self._n_jobs())
+        logging.info(f"Loaded cached model from {MODEL_PATH}")
+
+    def _n_jobs(self):
+        """Cores IsolationForest may use: config 'n_jobs', else ISOLATION_FOREST_N_JOBS, else all."""
+        if 'n_jobs' in self.config:
+            return self.config['n_jobs']
+        return int(os.getenv('ISOLATION_FOREST_N_JOBS', -1))
+
+    def _save_model(self):
+        """Persist the fitted scaler and model for subsequent runs."""
+        # Write then rename so other worker processes never load a partial file
+        tmp_path = f"{MODEL_PATH}.{os.getpid()}.tmp"
+        joblib.dump(
+            {'features': self.config['features'], 'mean': self._mean, 'std': self._std, 'model': self.model},
+            tmp_path
+        )
+        os.replace(tmp_path, MODEL_PATH)
+        logging.info(f"Saved fitted model to {MODEL_PATH}")
+
     def load_and_preprocess_data(self, filepath):
         """Load and preprocess network traffic data."""
         try:
-            df = pd.read_csv(filepath)
+            df = self._read_data(filepath)
             logging.info(f"Successfully loaded data from {filepath}")
             
             # Data validation
@@ -66,6 +135,34 @@ class NetworkAnomalyDetector:
             logging.error(f"Error loading data: {str(e)}")
             raise
 
+    def _read_data(self, filepath):
+        """Read traffic data from CSV or Parquet.
+
+        Every uploaded column is kept for the mitigation engine and the anomaly
+        report; only the matrix handed to IsolationForest is narrowed to features.
+        """
+        if filepath.lower().endswith('.parquet'):
+            return pd.read_parquet(filepath, engine='pyarrow')
+        return self._read_csv(filepath)
+
+    def _read_csv(self, filepath):
+        """Parse CSV with PyArrow's multi-threaded reader, falling back to pandas."""
+        import pyarrow as pa
+        from pyarrow import csv as pacsv
+        
+        try:
+            table = pacsv.read_csv(
+                filepath,
+                read_options=pacsv.ReadOptions(use_threads=True),
+                # Leave timestamps as text, as pd.read_csv does
+                convert_options=pacsv.ConvertOptions(column_types={'timestamp': pa.string()})
+            )
+        except pa.ArrowInvalid as e:
+            logging.warning(f"PyArrow could not parse {filepath} ({str(e)}); using pandas reader")
+            return pd.read_csv(filepath)
+        
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+
     def _validate_data(self, df):
         """Validate input data structure."""
         missing_features = set(self.config['features']) - set(df.columns)
@@ -84,29 +181,53 @@ class NetworkAnomalyDetector:
         return df
 
     def _scale_features(self, df):
-        """Scale features using StandardScaler."""
-        df[self.config['features']] = self.scaler.fit_transform(df[self.config['features']])
+        """Standardize features in place, reusing the cached mean/std if available."""
+        arr = df[self.config['features']].to_numpy(dtype=np.float32, copy=True)
+        if self.model is None:
+            self._mean = arr.mean(axis=0, dtype=np.float64).astype(np.float32)
+            self._std = arr.std(axis=0, dtype=np.float64).astype(np.float32)
+            # Constant columns are left centred rather than divided by zero
+            self._std[self._std == 0] = 1.0
+        np.subtract(arr, self._mean, out=arr)
+        np.divide(arr, self._std, out=arr)
+        df[self.config['features']] = arr
         return df
 
     def detect_anomalies(self, df):
         """Detect anomalies using Isolation Forest."""
         try:
-            self.model = IsolationForest(
-                contamination=self.config['contamination'],
-                random_state=self.config['random_state'],
-                n_estimators=self.config['n_estimators']
-            )
+            # Row-major float32 matrix: trees traverse one sample at a time
+            X = np.ascontiguousarray(df[self.config['features']].to_numpy(dtype=np.float32))
+            
+            # Fit once; later runs reuse the cached model
+            if self.model is None:
+                # Imported here so startup and non-analysis routes skip sklearn
+                from sklearn.ensemble import IsolationForest
+                self.model = IsolationForest(
+                    contamination=self.config['contamination'],
+                    random_state=self.config['random_state'],
+                    n_estimators=self.config['n_estimators'],
+                    n_jobs=self._n_jobs()
+                )
+                self.model.fit(X)
+                self._save_model()
             
-            # Fit and predict
-            predictions = self.model.fit_predict(df[self.config['features']])
-            df['anomaly'] = predictions
-            df['anomaly'] = df['anomaly'].map({1: 'Normal', -1: 'Anomaly'})
+            # Calculate anomaly scores; predict() would be the same threshold
+            # applied to a second traversal of every tree
+            scores = self.model.score_samples(X)
+            df['anomaly_score'] = scores
             
-            # Calculate anomaly scores
-            df['anomaly_score'] = self.model.score_samples(df[self.config['features']])
+            # Predict
+            is_anomaly = scores < self.model.offset_
+            self.anomaly_count = int(is_anomaly.sum())
+            # Two-category labels are stored as int8 codes, not per-row strings
+            df['anomaly'] = pd.Categorical.from_codes(
+                is_anomaly.astype(np.int8),
+                categories=['Normal', 'Anomaly']
+            )
             
             # Log anomaly statistics
-            self._log_anomaly_stats(df)
+            self._log_anomaly_stats(scores)
             
             return df
             
@@ -114,61 +235,162 @@ class NetworkAnomalyDetector:
             logging.error(f"Error in anomaly detection: {str(e)}")
             raise
 
-    def _log_anomaly_stats(self, df):
+    def _log_anomaly_stats(self, scores):
         """Log detailed anomaly statistics."""
         anomaly_stats = {
-            'total_records': len(df),
-            'anomaly_counts': df['anomaly'].value_counts().to_dict(),
+            'total_records': len(scores),
+            'anomaly_counts': {
+                'Normal': len(scores) - self.anomaly_count,
+                'Anomaly': self.anomaly_count
+            },
             'anomaly_score_stats': {
-                'mean': df['anomaly_score'].mean(),
-                'min': df['anomaly_score'].min(),
-                'max': df['anomaly_score'].max()
+                'mean': float(scores.mean()),
+                'min': float(scores.min()),
+                'max': float(scores.max())
             }
         }
         logging.info(f"Anomaly detection statistics: {json.dumps(anomaly_stats, indent=2)}")
 
-    def visualize_results(self, df):
-        """Create and save visualization of anomalies."""
+    def get_sorted_anomalies(self, df):
+        """Return anomalous records ordered from most to least anomalous."""
+        anomaly_idx = np.flatnonzero((df['anomaly'] == 'Anomaly').to_numpy())
+        order = np.argsort(df['anomaly_score'].to_numpy()[anomaly_idx], kind='stable')
+        return df.iloc[anomaly_idx[order]]
+
+    def export_anomalies(self, anomalies_df, timestamp):
+        """Write anomalous records to outputs/ as CSV and Parquet."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        base_path = os.path.join('outputs', f'anomalies_{timestamp}')
+        pq.write_table(pa.Table.from_pandas(anomalies_df, preserve_index=False), f'{base_path}.parquet')
+        
+        # Arrow's CSV writer always quotes headers and strings, prints 1.0 as 1 and
+        # tz-aware times with a Z suffix, so the report keeps pandas' CSV format
+        anomalies_df.to_csv(f'{base_path}.csv', index=False)
+        logging.info(f"Anomalous records exported to anomalies_{timestamp}.csv/.parquet")
+
+    def visualize_results(self, df, timestamp=None):
+        """Render visualizations of anomalies in the background.
+
+        Returns a dict of futures keyed by plot type ('scatter', 'distribution');
+        call ``.result()`` on one to wait for its PNG to be written.
+        """
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            if timestamp is None:
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            
+            # Snapshot the plotted columns so the caller may keep using df
+            plot_columns = list(dict.fromkeys(self.config['features'][:2] + ['anomaly', 'anomaly_score']))
+            plot_df = df[plot_columns].copy()
             
             # Create multiple visualizations
-            self._create_scatter_plot(df, timestamp)
-            self._create_anomaly_score_distribution(df, timestamp)
+            plots = {
+                'scatter': self._create_scatter_plot,
+                'distribution': self._create_anomaly_score_distribution
+            }
+            futures = {}
+            for plot_type, create_plot in plots.items():
+                # Marked before returning, so any worker process can tell the plot is coming
+                path = plot_path(plot_type, timestamp)
+                open(path + PENDING_SUFFIX, 'w').close()
+                futures[plot_type] = plot_executor.submit(self._render, create_plot, plot_df, timestamp, path)
+            return futures
             
         except Exception as e:
             logging.error(f"Error in visualization: {str(e)}")
             raise
 
+    @staticmethod
+    def _render(create_plot, df, timestamp, path):
+        """Run a plot function on the executor, recording failures next to the PNG."""
+        try:
+            create_plot(df, timestamp)
+        except Exception as e:
+            logging.error(f"Error in visualization: {str(e)}")
+            with open(path + FAILED_SUFFIX, 'w') as f:
+                f.write(str(e))
+            raise
+        finally:
+            try:
+                os.remove(path + PENDING_SUFFIX)
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def _plotting_modules():
+        """Import matplotlib (Agg backend) and seaborn on first use."""
+        import matplotlib
+        matplotlib.use('Agg')
+        from matplotlib.figure import Figure
+        import seaborn as sns
+        return Figure, sns
+
+    @staticmethod
+    def _save_figure(fig, path):
+        """Write a PNG atomically, so readers never see a partial file."""
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        fig.savefig(tmp_path, format='png')
+        os.replace(tmp_path, path)
+
     def _create_scatter_plot(self, df, timestamp):
         """Create scatter plot of anomalies."""
-        plt.figure(figsize=(12, 8))
+        Figure, sns = self._plotting_modules()
+        
+        # Cap normal points so render cost stays bounded on large uploads
+        is_normal = df['anomaly'] == 'Normal'
+        normals = df[is_normal]
+        if len(normals) > SCATTER_MAX_NORMAL_POINTS:
+            normals = normals.sample(n=SCATTER_MAX_NORMAL_POINTS, random_state=0)
+        df = pd.concat([normals, df[~is_normal]])
+        
+        # Figure objects avoid pyplot's global state, so renders can run concurrently
+        fig = Figure(figsize=(12, 8))
+        ax = fig.subplots()
         sns.scatterplot(
             x=self.config['features'][0],
             y=self.config['features'][1],
             hue='anomaly',
             data=df,
             palette={'Normal': 'blue', 'Anomaly': 'red'},
-            alpha=0.6
+            alpha=0.6,
+            ax=ax
         )
-        plt.title('Network Traffic Anomaly Detection')
-        plt.savefig(os.path.join('outputs', f'anomaly_scatter_{timestamp}.png'))
-        plt.close()
+        ax.set_title('Network Traffic Anomaly Detection')
+        self._save_figure(fig, plot_path('scatter', timestamp))
 
     def _create_anomaly_score_distribution(self, df, timestamp):
         """Create distribution plot of anomaly scores."""
-        plt.figure(figsize=(12, 6))
-        sns.histplot(data=df, x='anomaly_score', hue='anomaly', bins=50)
-        plt.title('Distribution of Anomaly Scores')
-        plt.savefig(os.path.join('outputs', f'anomaly_distribution_{timestamp}.png'))
-        plt.close()
+        Figure, sns = self._plotting_modules()
+        
+        fig = Figure(figsize=(12, 6))
+        ax = fig.subplots()
+        sns.histplot(data=df, x='anomaly_score', hue='anomaly', bins=50, ax=ax)
+        ax.set_title('Distribution of Anomaly Scores')
+        self._save_figure(fig, plot_path('distribution', timestamp))
 
     def get_mitigation_recommendations(self, df):
         """Get mitigation recommendations for detected anomalies."""
         try:
-            recommendations = self.mitigation_engine.analyze_anomalies(df)
+            fingerprint = self._anomaly_fingerprint(df)
+            with _recommendation_cache_lock:
+                cached = _recommendation_cache.get(fingerprint)
+                if cached is not None:
+                    _recommendation_cache.move_to_end(fingerprint)
             
-            # Log recommendations
+            if cached is not None:
+                logging.info("Reusing mitigation recommendations for identical anomaly fingerprint")
+                recommendations = copy.deepcopy(cached)
+            else:
+                recommendations = self.mitigation_engine.analyze_anomalies(df)
+                
+                if fingerprint is not None:
+                    with _recommendation_cache_lock:
+                        _recommendation_cache[fingerprint] = copy.deepcopy(recommendations)
+                        if len(_recommendation_cache) > RECOMMENDATION_CACHE_SIZE:
+                            _recommendation_cache.popitem(last=False)
+            
+            # Log recommendations for every upload, cached or not, to keep the audit trail
             logging.info(f"Generated {len(recommendations)} mitigation recommendations")
             for rec in recommendations:
                 logging.info(f"Recommendation: {rec['type']} - {rec['description']}")
@@ -179,21 +401,38 @@ class NetworkAnomalyDetector:
             logging.error(f"Error generating mitigation recommendations: {str(e)}")
             raise
 
+    def _anomaly_fingerprint(self, df):
+        """Hash everything the mitigation engine's verdict depends on.
+
+        The key covers the record count, the (destination_port, protocol) mix of
+        anomalous records and their feature values (bytes, duration, rates, ...),
+        so a cache hit only occurs when the engine would see the same anomalies.
+        """
+        anomalies = df[df['anomaly'] == 'Anomaly']
+        columns = [col for col in ['destination_port', 'protocol'] if col in df.columns]
+        counts = list(anomalies[columns].value_counts().sort_index().items()) if columns else []
+        
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr((len(df), columns, counts)).encode())
+        digest.update(pd.util.hash_pandas_object(anomalies[self.config['features']], index=False).to_numpy().tobytes())
+        return digest.hexdigest()
+
 def main():
     try:
         detector = NetworkAnomalyDetector()
         
         # Load and process data
-        df = detector.load_and_preprocess_data("network_traffic.csv")
+        data_file = "network_traffic.parquet" if os.path.exists("network_traffic.parquet") else "network_traffic.csv"
+        df = detector.load_and_preprocess_data(data_file)
         
         # Detect anomalies
         df = detector.detect_anomalies(df)
         
         # Visualize results
-        detector.visualize_results(df)
+        plots = detector.visualize_results(df)
         
         # Generate alerts and export results
-        anomaly_count = df['anomaly'].value_counts().get('Anomaly', 0)
+        anomaly_count = detector.anomaly_count
         if anomaly_count > 0:
             alert_msg = f"ALERT: Detected {anomaly_count} anomalous activities in network traffic!"
             print(alert_msg)
@@ -201,12 +440,14 @@ def main():
             
             # Export anomalous records
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            anomalies_df = df[df['anomaly'] == 'Anomaly'].sort_values('anomaly_score')
-            anomalies_df.to_csv(os.path.join('outputs', f'anomalies_{timestamp}.csv'), index=False)
-            logging.info(f"Anomalous records exported to anomalies_{timestamp}.csv")
+            detector.export_anomalies(detector.get_sorted_anomalies(df), timestamp)
         else:
             logging.info("No anomalies detected in network traffic")
             print("Network traffic is normal.")
+        
+        # Wait for the background renders before exiting
+        for plot in plots.values():
+            plot.result()
 
     except Exception as e:
         logging.error(f"Error in main execution: {str(e)}")
@@ -0,0 +1,46 @@
+import os
+import shutil
+import sys
+import types
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+try:
+    import utils.mitigation_engine  # noqa: F401
+except ModuleNotFoundError:
+    # utils/mitigation_engine.py is not part of this tree; main.py imports it at
+    # module level, so register a minimal stand-in before any test imports main
+    class MitigationEngine:
+        def analyze_anomalies(self, df):
+            return []
+
+    utils_pkg = types.ModuleType('utils')
+    utils_pkg.__path__ = []
+    engine_module = types.ModuleType('utils.mitigation_engine')
+    engine_module.MitigationEngine = MitigationEngine
+    utils_pkg.mitigation_engine = engine_module
+    sys.modules['utils'] = utils_pkg
+    sys.modules['utils.mitigation_engine'] = engine_module
+
+from generate_sample_data import generate_sample_data
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run in a scratch directory holding config.json, outputs/ and uploads/."""
+    shutil.copy(os.path.join(REPO_ROOT, 'config.json'), tmp_path)
+    (tmp_path / 'outputs').mkdir()
+    (tmp_path / 'uploads').mkdir()
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def traffic_csv(workdir):
+    """A small generated traffic file."""
+    path = str(workdir / 'traffic.csv')
+    generate_sample_data(duration_hours=2, output_file=path)
+    return path
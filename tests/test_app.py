@@ -0,0 +1,93 @@
+import os
+import time
+
+import joblib
+import pytest
+
+from app import app
+from generate_sample_data import generate_sample_data
+from main import MODEL_PATH, PENDING_SUFFIX, NetworkAnomalyDetector, plot_path
+
+
+@pytest.fixture
+def client(workdir, monkeypatch):
+    monkeypatch.setitem(app.config, 'TESTING', True)
+    monkeypatch.setitem(app.config, 'UPLOAD_FOLDER', str(workdir / 'uploads'))
+    # send_file resolves the routes' relative outputs/ paths against root_path
+    monkeypatch.setattr(app, 'root_path', str(workdir))
+    with app.test_client() as client:
+        yield client
+
+
+def test_retrain_overwrites_cached_model(client, traffic_csv, workdir):
+    detector = NetworkAnomalyDetector(use_cached_model=False)
+    detector.detect_anomalies(detector.load_and_preprocess_data(traffic_csv))
+    old_mean = joblib.load(MODEL_PATH)['mean']
+    os.utime(MODEL_PATH, (0, 0))
+
+    other_csv = workdir / 'other.csv'
+    generate_sample_data(duration_hours=3, output_file=str(other_csv))
+    with open(other_csv, 'rb') as f:
+        response = client.post('/retrain', data={'file': (f, 'other.csv')})
+
+    assert response.status_code == 200
+    assert response.get_json()['success'] is True
+    assert os.path.getmtime(MODEL_PATH) > 0
+    assert (joblib.load(MODEL_PATH)['mean'] != old_mean).any()
+
+
+def test_retrain_rejects_unsupported_file_type(client):
+    with open(__file__, 'rb') as f:
+        response = client.post('/retrain', data={'file': (f, 'traffic.txt')})
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Invalid file type'
+
+
+def test_download_routes_parquet_and_csv_separately(client, workdir):
+    (workdir / 'outputs' / 'anomalies_20240101_000000.parquet').write_bytes(b'PAR1 parquet')
+    (workdir / 'outputs' / 'anomalies_20240101_000000.csv').write_bytes(b'csv')
+
+    parquet = client.get('/download/20240101_000000.parquet')
+    csv = client.get('/download/20240101_000000')
+
+    assert parquet.status_code == 200
+    assert parquet.data == b'PAR1 parquet'
+    assert 'anomalies_20240101_000000.parquet' in parquet.headers['Content-Disposition']
+    assert csv.status_code == 200
+    assert csv.data == b'csv'
+
+
+def test_visualization_for_unknown_timestamp_fails_fast(client):
+    started = time.monotonic()
+    response = client.get('/visualization/bogus/scatter')
+
+    assert response.status_code == 404
+    assert time.monotonic() - started < 1
+
+
+def test_visualization_waits_for_pending_render(client, traffic_csv):
+    detector = NetworkAnomalyDetector(use_cached_model=False)
+    df = detector.detect_anomalies(detector.load_and_preprocess_data(traffic_csv))
+    detector.visualize_results(df, '20240101_000000')
+
+    response = client.get('/visualization/20240101_000000/scatter')
+
+    assert response.status_code == 200
+    assert response.data.startswith(b'\x89PNG')
+    assert not os.path.exists(plot_path('scatter', '20240101_000000') + PENDING_SUFFIX)
+
+
+def test_visualization_reports_failed_render(client):
+    path = plot_path('distribution', '20240101_000000')
+    open(path + PENDING_SUFFIX, 'w').close()
+
+    def broken_plot(df, timestamp):
+        raise RuntimeError('render failed')
+
+    with pytest.raises(RuntimeError):
+        NetworkAnomalyDetector._render(broken_plot, None, '20240101_000000', path)
+    response = client.get('/visualization/20240101_000000/distribution')
+
+    assert response.status_code == 500
+    assert not os.path.exists(path + PENDING_SUFFIX)
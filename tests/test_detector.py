@@ -0,0 +1,84 @@
+from datetime import datetime, timezone
+
+import pandas as pd
+import pytest
+
+from generate_sample_data import generate_sample_data
+import main
+from main import NetworkAnomalyDetector
+
+
+def test_uploaded_columns_are_kept_for_reporting(traffic_csv, workdir):
+    df = pd.read_csv(traffic_csv)
+    df['source_ip'] = '10.0.0.1'
+    csv_path = str(workdir / 'with_ip.csv')
+    parquet_path = str(workdir / 'with_ip.PARQUET')
+    df.to_csv(csv_path, index=False)
+    df.to_parquet(parquet_path, index=False)
+
+    detector = NetworkAnomalyDetector(use_cached_model=False)
+    for path in (csv_path, parquet_path):
+        loaded = detector.load_and_preprocess_data(path)
+        assert list(loaded.columns) == list(df.columns)
+        assert (loaded['source_ip'] == '10.0.0.1').all()
+
+
+def test_csv_read_matches_pandas_for_timestamps_and_bom(traffic_csv, workdir):
+    bom_path = str(workdir / 'excel.csv')
+    with open(traffic_csv, encoding='utf-8') as src, open(bom_path, 'w', encoding='utf-8-sig') as dst:
+        dst.write(src.read())
+
+    loaded = NetworkAnomalyDetector()._read_csv(bom_path)
+    expected = pd.read_csv(bom_path)
+
+    assert list(loaded.columns) == list(expected.columns)
+    assert loaded['timestamp'].tolist() == expected['timestamp'].tolist()
+
+
+@pytest.mark.parametrize('start_date', [
+    datetime(2024, 1, 1, 0, 0, 0, 622720),
+    datetime(2024, 1, 1, tzinfo=timezone.utc),
+], ids=['naive', 'tz-aware'])
+@pytest.mark.parametrize('extension', ['csv', 'parquet'])
+def test_exported_csv_matches_pandas(workdir, start_date, extension):
+    path = str(workdir / f'traffic.{extension}')
+    generate_sample_data(start_date=start_date, duration_hours=2, output_file=path)
+    detector = NetworkAnomalyDetector(use_cached_model=False)
+    df = detector.detect_anomalies(detector.load_and_preprocess_data(path))
+    anomalies = detector.get_sorted_anomalies(df)
+
+    detector.export_anomalies(anomalies, '20240101_000000')
+
+    with open(workdir / 'outputs' / 'anomalies_20240101_000000.csv', newline='') as f:
+        assert f.read() == anomalies.to_csv(index=False)
+    assert pd.read_parquet(workdir / 'outputs' / 'anomalies_20240101_000000.parquet').equals(
+        anomalies.reset_index(drop=True)
+    )
+
+
+class RecordingEngine:
+    """Mitigation engine stand-in that counts how often it is consulted."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def analyze_anomalies(self, df):
+        self.calls += 1
+        return [{'type': 'Traffic Spike', 'description': f'call {self.calls}'}]
+
+
+def test_recommendation_cache_is_keyed_on_anomaly_volumes(traffic_csv):
+    main._recommendation_cache.clear()
+    detector = NetworkAnomalyDetector(use_cached_model=False)
+    detector.mitigation_engine = RecordingEngine()
+    df = detector.detect_anomalies(detector.load_and_preprocess_data(traffic_csv))
+
+    first = detector.get_mitigation_recommendations(df)
+    assert detector.get_mitigation_recommendations(df.copy()) == first
+    assert detector.mitigation_engine.calls == 1
+
+    # Same port/protocol mix, different traffic volume
+    scaled = df.copy()
+    scaled['bytes_transferred'] *= 10
+    detector.get_mitigation_recommendations(scaled)
+    assert detector.mitigation_engine.calls == 2
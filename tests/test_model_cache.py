@@ -0,0 +1,48 @@
+import json
+import os
+
+from main import MODEL_PATH, NetworkAnomalyDetector
+
+
+def fit_and_cache(filepath):
+    """Fit a fresh detector on filepath, which saves it to MODEL_PATH."""
+    detector = NetworkAnomalyDetector(use_cached_model=False)
+    detector.detect_anomalies(detector.load_and_preprocess_data(filepath))
+    return detector
+
+
+def age_config(seconds):
+    """Make config.json older than the cached model by the given amount."""
+    stamp = os.path.getmtime(MODEL_PATH) - seconds
+    os.utime('config.json', (stamp, stamp))
+
+
+def test_fitted_model_is_cached_and_reused(traffic_csv):
+    fit_and_cache(traffic_csv)
+    age_config(10)
+
+    detector = NetworkAnomalyDetector()
+
+    assert os.path.exists(MODEL_PATH)
+    assert detector.model is not None
+    assert detector._mean is not None
+
+
+def test_cache_is_ignored_when_config_is_newer(traffic_csv):
+    fit_and_cache(traffic_csv)
+    age_config(-10)
+
+    assert NetworkAnomalyDetector().model is None
+
+
+def test_cache_is_ignored_when_features_change(traffic_csv):
+    fit_and_cache(traffic_csv)
+    with open('config.json') as f:
+        config = json.load(f)
+    config['features'] = config['features'][:3]
+    with open('config.json', 'w') as f:
+        json.dump(config, f)
+    # Only the feature list differs; the config itself is older than the model
+    age_config(10)
+
+    assert NetworkAnomalyDetector().model is None